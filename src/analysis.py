@@ -5,7 +5,9 @@ Este script:
 - Carga timestamps desde una base de datos.
 - Calcula los tiempos entre eventos (time_between_data).
 - Calcula estadística descriptiva de los datos.
-- Utiliza Fitter para comparar varias distribuciones de probabilidad.
+- Ajusta varias distribuciones de probabilidad por máxima verosimilitud y
+  las compara mediante la suma de errores cuadrados (SSE) frente al
+  histograma de los datos.
 - Calcula los momentos teóricos del modelo seleccionado (media, varianza,
   desviación estándar, skewness y kurtosis).
 - Genera gráficos descriptivos (histograma de datos y ajuste de mejor
@@ -14,6 +16,10 @@ Este script:
 
 import os
 import logging
+import warnings
+from collections.abc import Iterator
+from multiprocessing import Pool
+from operator import itemgetter
 
 import numpy as np
 import pandas as pd
@@ -26,14 +32,217 @@ from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
 from fitter import Fitter, get_common_distributions
 
+try:
+    # ConnectorX es opcional: si no está instalado se usa SQLAlchemy
+    import connectorx as cx
+except ImportError:
+    cx = None
+
 
 logger = logging.getLogger(__name__)
 
+# Estilo de las gráficas: base clásica de matplotlib con fondos blancos y grid
+_STYLE_DICT = {
+    "figure.facecolor": "white",
+    "axes.facecolor": "white",
+    "axes.edgecolor": "black",
+    "axes.grid": True,
+    "grid.color": "0.8",
+    "grid.linestyle": ":",
+    "grid.linewidth": 0.8,
+    "axes.spines.top": True,
+    "axes.spines.right": True,
+    "axes.linewidth": 1.0,
+    "xtick.direction": "in",
+    "ytick.direction": "in",
+    "font.size": 11,
+}
+
+
+def _apply_style() -> None:
+    """
+    Aplica el estilo de las gráficas del módulo.
+
+    Se ejecuta una sola vez al importar el módulo, en lugar de en cada
+    llamada a las funciones de graficación.
+    """
+    plt.style.use("classic")
+    mpl.rcParams.update(_STYLE_DICT)
+    sns.set_theme(style="whitegrid")
+
+
+_apply_style()
+
+# Esquemas de URL que ConnectorX puede leer directamente
+_CONNECTORX_SCHEMES = ("sqlite", "postgresql", "mysql", "mssql")
+
+# Consultas que calculan en la base de datos la diferencia en segundos entre
+# timestamps consecutivos mediante la función de ventana LAG, de modo que solo
+# se transfieren los intervalos. La primera fila no tiene predecesor (NULL) y
+# se descarta en la misma consulta.
+_TIME_BETWEEN_QUERIES = {
+    # Las funciones de fecha de SQLite solo resuelven milisegundos, por lo que
+    # se separan los segundos enteros y la fracción del texto almacenado
+    # ("YYYY-MM-DD HH:MM:SS.ffffff") para conservar los microsegundos
+    "sqlite": (
+        "SELECT time_between_data FROM ("
+        "SELECT (s - LAG(s) OVER w) + (f - LAG(f) OVER w) "
+        "AS time_between_data, ts FROM ("
+        "SELECT CAST(strftime('%s', {column}) AS INTEGER) AS s, "
+        "CAST(substr({column}, 20) AS REAL) AS f, {column} AS ts "
+        "FROM {table} WHERE {column} IS NOT NULL) AS t "
+        "WINDOW w AS (ORDER BY ts)) AS deltas "
+        "WHERE time_between_data IS NOT NULL ORDER BY ts"
+    ),
+    "postgresql": (
+        "SELECT time_between_data FROM ("
+        "SELECT CAST(EXTRACT(EPOCH FROM {column} - LAG({column}) "
+        "OVER (ORDER BY {column})) AS DOUBLE PRECISION) "
+        "AS time_between_data, {column} AS ts "
+        "FROM {table} WHERE {column} IS NOT NULL) AS deltas "
+        "WHERE time_between_data IS NOT NULL ORDER BY ts"
+    ),
+}
+
+
+def _url_scheme(database_url: str) -> str:
+    """
+    Obtiene el dialecto de una URL de SQLAlchemy, sin el driver.
+
+    Parameters
+    ----------
+    database_url : str
+        URL de conexión a la base de datos, por ejemplo
+        postgresql+psycopg2://usuario@host/db.
+
+    Returns
+    -------
+    str
+        Nombre del dialecto (por ejemplo, "postgresql" o "sqlite").
+    """
+    return database_url.split("://", 1)[0].split("+", 1)[0]
+
+
+def _connectorx_url(database_url: str) -> str | None:
+    """
+    Convierte una URL de SQLAlchemy al formato que espera ConnectorX.
+
+    SQLAlchemy interpreta sqlite:///archivo.db como una ruta relativa,
+    mientras que ConnectorX espera una ruta absoluta. Además, se elimina el
+    driver de la URL (por ejemplo, postgresql+psycopg2://).
+
+    Parameters
+    ----------
+    database_url : str
+        URL de conexión a la base de datos en formato de SQLAlchemy.
+
+    Returns
+    -------
+    str or None
+        URL equivalente para ConnectorX, o None si ConnectorX no está
+        instalado o no soporta la base de datos indicada.
+    """
+    if cx is None or "://" not in database_url:
+        return None
+
+    scheme = _url_scheme(database_url)
+    rest = database_url.split("://", 1)[1]
+    if scheme not in _CONNECTORX_SCHEMES:
+        return None
+
+    if scheme == "sqlite":
+        path = rest[1:]
+        if not path or path == ":memory:":
+            return None
+        return f"sqlite://{os.path.abspath(path)}"
+
+    return f"{scheme}://{rest}"
+
+
+def _read_sql_chunks(
+    database_url: str,
+    query: str,
+    chunksize: int,
+) -> Iterator[pd.DataFrame]:
+    """
+    Ejecuta una consulta y devuelve el resultado por bloques de filas.
+
+    Si ConnectorX está disponible, construye las columnas en Rust, sin crear
+    un objeto de Python por fila como ocurre con pd.read_sql, y devuelve el
+    resultado completo en un solo bloque. En caso contrario, o si ConnectorX
+    falla, se usa SQLAlchemy con un cursor del lado del servidor
+    (stream_results), de modo que en memoria solo se mantienen chunksize
+    filas a la vez.
+
+    Parameters
+    ----------
+    database_url : str
+        URL de conexión a la base de datos.
+    query : str
+        Consulta SQL a ejecutar.
+    chunksize : int
+        Número máximo de filas por bloque al leer con SQLAlchemy.
+
+    Yields
+    ------
+    pd.DataFrame
+        Bloques consecutivos del resultado de la consulta.
+
+    Raises
+    ------
+    RuntimeError
+        Si ocurre un problema al acceder a la base de datos.
+    """
+    connectorx_url = _connectorx_url(database_url)
+    if connectorx_url is not None:
+        try:
+            df = cx.read_sql(connectorx_url, query, return_type="pandas")
+        except RuntimeError as exc:
+            logger.warning(
+                "ConnectorX no pudo leer los datos (%s); se usa SQLAlchemy.", exc
+            )
+        else:
+            yield df
+            return
+
+    try:
+        engine = create_engine(database_url)
+        with engine.connect().execution_options(
+            stream_results=True, max_row_buffer=chunksize
+        ) as conn:
+            yield from pd.read_sql(query, conn, chunksize=chunksize)
+    except (SQLAlchemyError, pd.errors.DatabaseError) as exc:
+        logger.error("Error al acceder a la base de datos: %s", exc)
+        raise RuntimeError(
+            "No se pudieron cargar los datos desde la base de datos."
+        ) from exc
+
+
+def _raise_empty_table(table_name: str) -> None:
+    """
+    Registra y lanza el error de tabla sin timestamps.
+
+    Parameters
+    ----------
+    table_name : str
+        Nombre de la tabla consultada.
+
+    Raises
+    ------
+    RuntimeError
+        Siempre, indicando que la tabla de eventos está vacía.
+    """
+    logger.error("La tabla '%s' no contiene filas; sin datos.", table_name)
+    raise RuntimeError(
+        "La tabla de eventos está vacía; no hay datos para analizar."
+    )
+
 
 def load_time_between_data(
     database_url: str,
     table_name: str = "event",
     timestamp_column: str = "timestamp",
+    chunksize: int = 200_000,
 ) -> np.ndarray:
     """
     Carga timestamps desde la base de datos y calcula los tiempos entre
@@ -48,6 +257,9 @@ def load_time_between_data(
     timestamp_column : str
         Nombre de la columna que contiene los timestamps. Por defecto,
         "timestamp".
+    chunksize : int
+        Número de filas que se leen por bloque cuando se usa SQLAlchemy. Por
+        defecto, 200 000.
 
     Returns
     -------
@@ -63,47 +275,80 @@ def load_time_between_data(
         vacía, la columna de timestamp no existe o no hay suficientes
         registros para calcular al menos un intervalo de tiempo.
     """
-    try:
-        engine = create_engine(database_url)
-
+    delta_query = _TIME_BETWEEN_QUERIES.get(_url_scheme(database_url))
+    if delta_query is not None:
+        # La base de datos calcula los intervalos y solo se transfieren estos
+        query = delta_query.format(table=table_name, column=timestamp_column)
+        parts = [
+            chunk["time_between_data"].to_numpy(dtype=np.float64)
+            for chunk in _read_sql_chunks(database_url, query, chunksize)
+        ]
+        time_between_data = np.concatenate(parts) if parts else np.empty(0)
+
+        # Sin intervalos puede haber una sola fila o ninguna; solo en ese caso
+        # se consulta si existe algún timestamp para reportar el error
+        if time_between_data.size == 0:
+            probe = (
+                f"SELECT {timestamp_column} FROM {table_name} "
+                f"WHERE {timestamp_column} IS NOT NULL LIMIT 1"
+            )
+            if not any(
+                len(chunk) for chunk in _read_sql_chunks(database_url, probe, 1)
+            ):
+                _raise_empty_table(table_name)
+    else:
         # Leer la columna de timestamps y ordenarla en forma ascendente para
-        # garantizar que las diferencias se calculen en el orden temporal
+        # garantizar que las diferencias se calculen en el orden temporal. Los
+        # timestamps nulos se descartan en la consulta
         query = (
-            f"SELECT {timestamp_column} "
-            f"FROM {table_name} ORDER BY {timestamp_column} ASC"
-        )
-        df = pd.read_sql(query, con=engine)
-    except SQLAlchemyError as exc:
-        logger.error("Error al acceder a la base de datos: %s", exc)
-        raise RuntimeError(
-            "No se pudieron cargar los datos desde la base de datos."
-        ) from exc
-
-    # Manejo de errores
-    if df.empty:
-        logger.error("La tabla '%s' no contiene filas; sin datos.", table_name)
-        raise RuntimeError(
-            "La tabla de eventos está vacía; no hay datos para analizar."
+            f"SELECT {timestamp_column} FROM {table_name} "
+            f"WHERE {timestamp_column} IS NOT NULL "
+            f"ORDER BY {timestamp_column} ASC"
         )
 
-    try:
-        # Asegurar que la columna sea de tipo datetime para poder usar diff()
-        df[timestamp_column] = pd.to_datetime(df[timestamp_column])
-
-        # Calcular la diferencia entre timestamps consecutivos
-        df["time_between_data"] = df[timestamp_column].diff().dt.total_seconds()
-    except KeyError as exc:
-        logger.error(
-            "La columna '%s' no existe en la tabla '%s'.",
-            timestamp_column,
-            table_name,
-        )
-        raise RuntimeError(
-            "La estructura de la tabla no contiene la columna de timestamp."
-        ) from exc
-
-    # El primer valor es NaN, por lo que se elimina antes de convertir a numpy
-    time_between_data = df["time_between_data"].dropna().to_numpy()
+        # Por cada bloque solo se guardan sus diferencias; el último
+        # timestamp se arrastra al siguiente bloque para no perder el
+        # intervalo entre ambos
+        parts = []
+        last_ts = None
+        n_rows = 0
+        for chunk in _read_sql_chunks(database_url, query, chunksize):
+            try:
+                # Trabajar sobre la vista int64 (nanosegundos) de los
+                # timestamps para evitar columnas intermedias y objetos
+                # Timedelta
+                ts_ns = (
+                    pd.to_datetime(chunk[timestamp_column])
+                    .to_numpy(dtype="datetime64[ns]")
+                    .view("int64")
+                )
+            except KeyError as exc:
+                logger.error(
+                    "La columna '%s' no existe en la tabla '%s'.",
+                    timestamp_column,
+                    table_name,
+                )
+                raise RuntimeError(
+                    "La estructura de la tabla no contiene la columna de "
+                    "timestamp."
+                ) from exc
+
+            if ts_ns.size == 0:
+                continue
+            n_rows += ts_ns.size
+
+            if last_ts is None:
+                parts.append(np.diff(ts_ns))
+            else:
+                parts.append(np.diff(ts_ns, prepend=last_ts))
+            last_ts = ts_ns[-1]
+
+        # Manejo de errores
+        if n_rows == 0:
+            _raise_empty_table(table_name)
+
+        # Diferencia entre timestamps consecutivos, convertida a segundos
+        time_between_data = np.concatenate(parts).astype(np.float64) * 1e-9
 
     if time_between_data.size == 0:
         logger.error("No se pudieron calcular tiempos entre eventos.")
@@ -135,31 +380,172 @@ def compute_descriptive_stats(time_between_data: np.ndarray) -> pd.Series:
         - skewness: inclinación
         - kurtosis
     """
-    s = pd.Series(time_between_data)
+    # describe() obtiene n, min/max, media, varianza muestral (ddof=1),
+    # skewness y kurtosis en exceso; con bias=False se aplica la misma
+    # corrección de sesgo que usa pandas
+    desc = stats.describe(time_between_data, bias=False)
+    q25, median, q75 = np.quantile(time_between_data, [0.25, 0.5, 0.75])
+
+    # La corrección de sesgo no está definida con menos de 3 (skewness) o 4
+    # (kurtosis) muestras; en esos casos describe() devuelve el valor sesgado,
+    # mientras que pandas devuelve NaN
+    skewness = desc.skewness if desc.nobs >= 3 else np.nan
+    kurtosis = desc.kurtosis if desc.nobs >= 4 else np.nan
+
     stats_desc = pd.Series(
         {
-            "n": s.size,
-            "min": s.min(),
-            "max": s.max(),
-            "mean": s.mean(),
-            "median": s.median(),
-            "std": s.std(),
-            "q25": s.quantile(0.25),
-            "q75": s.quantile(0.75),
-            "skewness": s.skew(),
-            "kurtosis": s.kurtosis(),
+            "n": desc.nobs,
+            "min": desc.minmax[0],
+            "max": desc.minmax[1],
+            "mean": desc.mean,
+            "median": median,
+            "std": np.sqrt(desc.variance),
+            "q25": q25,
+            "q75": q75,
+            "skewness": skewness,
+            "kurtosis": kurtosis,
         }
     )
     return stats_desc
 
 
+def _fast_pdf(name: str, x: np.ndarray, params: dict) -> np.ndarray:
+    """
+    Evalúa la PDF de una distribución de scipy.stats.
+
+    Para la exponencial y la normal se usa la expresión en forma cerrada, que
+    evita el despacho genérico de rv_continuous.pdf (validación de
+    argumentos, broadcasting y máscaras). Para el resto de distribuciones se
+    usa scipy.stats.
+
+    Parameters
+    ----------
+    name : str
+        Nombre de la distribución en scipy.stats.
+    x : np.ndarray
+        Puntos donde se evalúa la PDF.
+    params : dict
+        Parámetros de la distribución (loc, scale y parámetros de forma).
+
+    Returns
+    -------
+    np.ndarray
+        Valores de la PDF en x.
+    """
+    if name == "expon":
+        loc = params.get("loc", 0.0)
+        scale = params.get("scale", 1.0)
+        z = (x - loc) / scale
+        return np.where(z >= 0, np.exp(-np.maximum(z, 0.0)) / scale, 0.0)
+
+    if name == "norm":
+        loc = params.get("loc", 0.0)
+        scale = params.get("scale", 1.0)
+        z = (x - loc) / scale
+        return np.exp(-0.5 * z**2) / (scale * np.sqrt(2 * np.pi))
+
+    return getattr(stats, name).pdf(x, **params)
+
+
+def _fit_one(
+    name: str,
+    data: np.ndarray,
+    y_hist: np.ndarray,
+    x_centers: np.ndarray,
+) -> tuple[str, dict, float]:
+    """
+    Ajusta una distribución por MLE y calcula su error cuadrático.
+
+    Para la exponencial y la normal el MLE tiene forma cerrada y se calcula
+    directamente; para el resto se usa el método fit de scipy.stats. Se
+    define a nivel de módulo para que pueda ejecutarse en un proceso
+    trabajador de multiprocessing.
+
+    Parameters
+    ----------
+    name : str
+        Nombre de la distribución en scipy.stats.
+    data : np.ndarray
+        Datos a los que se ajusta la distribución.
+    y_hist : np.ndarray
+        Densidad empírica del histograma de los datos.
+    x_centers : np.ndarray
+        Centros de los bins del histograma.
+
+    Returns
+    -------
+    tuple[str, dict, float]
+        Nombre de la distribución, parámetros ajustados (con los mismos
+        nombres que usa Fitter) y suma de errores cuadrados entre la PDF y el
+        histograma. Si el ajuste falla, el error es infinito.
+    """
+    dist = getattr(stats, name)
+    param_names = (dist.shapes.split(", ") if dist.shapes else []) + [
+        "loc",
+        "scale",
+    ]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            if name == "expon":
+                params = fit_exponential_fast(data)["params"]
+            elif name == "norm":
+                params = {"loc": float(np.mean(data)), "scale": float(np.std(data))}
+            else:
+                params = dict(zip(param_names, map(float, dist.fit(data))))
+            pdf = _fast_pdf(name, x_centers, params)
+            sse = float(np.sum((pdf - y_hist) ** 2))
+        except Exception as exc:
+            logger.warning("No se pudo ajustar %s: %s", name, exc)
+            return name, {}, np.inf
+
+    if not np.isfinite(sse):
+        sse = np.inf
+
+    return name, params, sse
+
+
+def fit_exponential_fast(time_between_data: np.ndarray) -> dict:
+    """
+    Ajusta una distribución exponencial con el estimador de máxima
+    verosimilitud en forma cerrada.
+
+    Para la exponencial con desplazamiento, el MLE es loc = min(x) y
+    scale = mean(x) - min(x), por lo que basta una pasada sobre los datos en
+    lugar de la optimización genérica de scipy.stats.
+
+    Parameters
+    ----------
+    time_between_data : np.ndarray
+        Arreglo de tiempos entre eventos en segundos.
+
+    Returns
+    -------
+    dict
+        Diccionario con la misma estructura que fit_candidate_distributions:
+        {"dist": "expon", "params": {"loc": ..., "scale": ...}}.
+    """
+    loc = float(np.min(time_between_data))
+    scale = float(np.mean(time_between_data)) - loc
+    return {"dist": "expon", "params": {"loc": loc, "scale": scale}}
+
+
 def fit_candidate_distributions(
     time_between_data: np.ndarray,
     distributions: list[str] | None = None,
     use_common_distributions: bool = True,
+    fast_expon_only: bool = False,
+    histogram: tuple[np.ndarray, np.ndarray] | None = None,
 ) -> dict:
     """
-    Ajusta distribuciones de probabilidad usando Fitter y devuelve la mejor.
+    Ajusta distribuciones de probabilidad y devuelve la de menor error.
+
+    Cada distribución candidata se ajusta por máxima verosimilitud en un
+    proceso distinto y se compara con el histograma de los datos mediante la
+    suma de errores cuadrados (SSE), el mismo criterio que usa Fitter.
+    Cuando se prueban todas las distribuciones de scipy.stats se usa Fitter,
+    que limita el tiempo de ajuste de cada una.
 
     Parameters
     ----------
@@ -174,14 +560,46 @@ def fit_candidate_distributions(
         Si es True y distributions es None, se utiliza
         get_common_distributions(). Si es False y distributions es
         None, Fitter utiliza su conjunto de distribuciones por defecto.
+    fast_expon_only : bool
+        Si es True, no se comparan distribuciones y solo se ajusta la
+        exponencial con fit_exponential_fast(). Por defecto, False.
+    histogram : tuple[np.ndarray, np.ndarray] or None
+        Densidad y bordes de los bins calculados con _empirical_pdf(), contra
+        los que se calcula el error de cada distribución. Si es None, se
+        calculan a partir de time_between_data. Fitter también usa esta
+        misma cantidad de bins.
 
     Returns
     -------
     dict
-        Diccionario con la mejor distribución según Fitter.
+        Diccionario con la mejor distribución ("dist") y sus parámetros
+        ajustados ("params").
+
+    Raises
+    ------
+    ValueError
+        Si algún nombre de distributions no corresponde a una distribución
+        continua de scipy.stats.
+    RuntimeError
+        Si ninguna de las distribuciones candidatas se pudo ajustar.
     """
+    if fast_expon_only:
+        return fit_exponential_fast(time_between_data)
+
     # Determinar qué conjunto de distribuciones usar
     if distributions is not None:
+        # Validar los nombres antes de repartirlos entre los procesos, donde
+        # un nombre inválido solo produciría un AttributeError poco claro
+        unknown = [
+            name
+            for name in distributions
+            if not isinstance(getattr(stats, name, None), stats.rv_continuous)
+        ]
+        if unknown:
+            raise ValueError(
+                "Distribuciones desconocidas en scipy.stats: "
+                + ", ".join(unknown)
+            )
         dist_list = distributions
     elif use_common_distributions:
         dist_list = get_common_distributions()
@@ -189,19 +607,45 @@ def fit_candidate_distributions(
         # Fitter usa todas las distribuciones por defecto
         dist_list = None
 
+    # Salto de línea para separar el log del ajuste de la salida previa
+    print()
+
+    # Densidad empírica y bordes de los bins contra los que se compara; se
+    # calculan una sola vez y también se comparten con Fitter
+    if histogram is None:
+        histogram = _empirical_pdf(time_between_data)
+    y_fit, x_bin = histogram
+
     if dist_list is None:
-        f = Fitter(time_between_data)
+        logger.info("Ajustando distribuciones candidatas con Fitter...")
+        f = Fitter(time_between_data, bins=len(x_bin) - 1)
+        f.fit()
+
+        best = f.get_best(method="sumsquare_error")
+        best_dist_name = list(best.keys())[0]
+        best_params = list(best.values())[0]
+
+        return {"dist": best_dist_name, "params": best_params}
+
+    logger.info("Ajustando %d distribuciones candidatas...", len(dist_list))
+
+    # Centros de los bins en los que se evalúa cada distribución
+    x_fit = 0.5 * (x_bin[1:] + x_bin[:-1])
+
+    tasks = [(name, time_between_data, y_fit, x_fit) for name in dist_list]
+    if len(tasks) < 2:
+        results = [_fit_one(*task) for task in tasks]
     else:
-        f = Fitter(time_between_data, distributions=dist_list)
+        n_workers = min(os.cpu_count() or 1, len(tasks))
+        with Pool(n_workers) as pool:
+            results = pool.starmap(_fit_one, tasks)
 
-    # Salto de línea para separar el log de Fitter de la salida previa
-    print()
-    logger.info("Ajustando distribuciones candidatas con Fitter...")
-    f.fit()
+    for name, _, sse in results:
+        logger.info("Ajustada %s: SSE=%.6f", name, sse)
 
-    best = f.get_best(method="sumsquare_error")
-    best_dist_name = list(best.keys())[0]
-    best_params = list(best.values())[0]
+    best_dist_name, best_params, best_sse = min(results, key=itemgetter(2))
+    if not np.isfinite(best_sse):
+        raise RuntimeError("No se pudo ajustar ninguna distribución candidata.")
 
     return {"dist": best_dist_name, "params": best_params}
 
@@ -210,7 +654,8 @@ def compute_model_moments(best_model: dict) -> pd.Series:
     """
     Calcula los momentos teóricos del modelo de probabilidad seleccionado.
 
-    Se utilizan las funciones de scipy.stats para obtener:
+    Para la exponencial se usan sus expresiones analíticas; para las demás
+    distribuciones se utilizan las funciones de scipy.stats para obtener:
 
     - media
     - varianza
@@ -236,11 +681,18 @@ def compute_model_moments(best_model: dict) -> pd.Series:
     dist_name = best_model["dist"]
     params = best_model["params"]
 
-    # Obtener el objeto de distribución de scipy.stats
-    dist = getattr(stats, dist_name)
+    if dist_name == "expon":
+        # Momentos exactos de la exponencial: media loc + scale, varianza
+        # scale^2, skewness 2 y kurtosis en exceso 6
+        loc = params.get("loc", 0.0)
+        scale = params.get("scale", 1.0)
+        mean, var, skew, kurt = loc + scale, scale**2, 2.0, 6.0
+    else:
+        # Obtener el objeto de distribución de scipy.stats
+        dist = getattr(stats, dist_name)
 
-    # mean, var, skew, kurtosis
-    mean, var, skew, kurt = dist.stats(**params, moments="mvsk")
+        # mean, var, skew, kurtosis
+        mean, var, skew, kurt = dist.stats(**params, moments="mvsk")
     std = np.sqrt(var)
 
     moments = pd.Series(
@@ -274,27 +726,50 @@ def _freedman_diaconis_bins(data: np.ndarray) -> int:
     int
         Número de bins a utilizar en un histograma.
     """
-    s = pd.Series(data)
-    iqr = s.quantile(0.75) - s.quantile(0.25)
+    q25, q75 = np.percentile(data, [25, 75])
+    iqr = q75 - q25
     if iqr == 0:
         return 10
-    bin_width = 2 * iqr / (len(s) ** (1 / 3))
+    bin_width = 2 * iqr / (data.size ** (1 / 3))
     if bin_width <= 0:
         return 10
-    bins = int(np.ceil((s.max() - s.min()) / bin_width))
+    bins = int(np.ceil((data.max() - data.min()) / bin_width))
     return max(bins, 10)
 
 
+def _empirical_pdf(data: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula el histograma normalizado (densidad empírica) de los datos.
+
+    Se calcula una sola vez en main() y se comparte entre el ajuste de
+    distribuciones y las gráficas, para no recorrer los datos varias veces.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Arreglo de datos numéricos.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Densidad de cada bin (y_fit) y bordes de los bins (x_bin), en el
+        mismo orden que np.histogram. La cantidad de bins se obtiene con la
+        regla de Freedman–Diaconis.
+    """
+    return np.histogram(data, bins=_freedman_diaconis_bins(data), density=True)
+
+
 def plot_histograma_datos(
     time_between_data: np.ndarray,
     output_path: str,
+    histogram: tuple[np.ndarray, np.ndarray] | None = None,
 ) -> None:
     """
     Genera una gráfica con el histograma de los tiempos entre eventos.
 
-    El histograma se construye usando seaborn.histplot y se formatea con un
-    estilo definido, además de aplicar configuración de matplotlib para fondos
-    blancos y grid.
+    El histograma se dibuja usando Axes.hist de matplotlib y se formatea
+    con un estilo definido, además de aplicar configuración de matplotlib
+    para fondos blancos y grid.
 
     Parameters
     ----------
@@ -303,41 +778,25 @@ def plot_histograma_datos(
     output_path : str
         Ruta de salida donde se guardará la figura en formato SVG. Si el
         directorio no existe, se crea automáticamente.
+    histogram : tuple[np.ndarray, np.ndarray] or None
+        Densidad y bordes de los bins calculados con _empirical_pdf(). Si es
+        None, se calculan a partir de time_between_data.
     """
-    n_bins = _freedman_diaconis_bins(time_between_data)
-
-    # Formato de estilo clásico para el histograma
-    plt.style.use("classic")
-    mpl.rcParams.update(
-        {
-            "figure.facecolor": "white",
-            "axes.facecolor": "white",
-            "axes.edgecolor": "black",
-            "axes.grid": True,
-            "grid.color": "0.8",
-            "grid.linestyle": ":",
-            "grid.linewidth": 0.8,
-            "axes.spines.top": True,
-            "axes.spines.right": True,
-            "axes.linewidth": 1.0,
-            "xtick.direction": "in",
-            "ytick.direction": "in",
-            "font.size": 11,
-        }
-    )
-    sns.set_theme(style="whitegrid")
-
-    df = pd.DataFrame(time_between_data, columns=["time_between_data"])
+    if histogram is None:
+        histogram = _empirical_pdf(time_between_data)
+    y_fit, x_bin = histogram
 
     fig, ax = plt.subplots(figsize=(8, 6))
-    sns.histplot(
-        df["time_between_data"],
-        bins=n_bins,
-        stat="density",
-        color="C0",
-        alpha=0.7,
+    # Se dibujan las densidades ya calculadas: cada bin aporta su densidad
+    # como peso, sin volver a recorrer time_between_data. Las barras se
+    # rasterizan para no escribir un <path> por bin en el SVG
+    ax.hist(
+        x_bin[:-1],
+        bins=x_bin,
+        weights=y_fit,
+        color=mpl.colors.to_rgba("C0", alpha=0.7),
         edgecolor="black",
-        ax=ax,
+        rasterized=True,
     )
     ax.set_title("Histograma de tiempos entre eventos")
     ax.set_xlabel("Tiempo entre eventos [s]")
@@ -348,7 +807,7 @@ def plot_histograma_datos(
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     fig.tight_layout()
-    fig.savefig(output_path, format="svg", bbox_inches="tight")
+    fig.savefig(output_path, format="svg", dpi=150, bbox_inches="tight")
     plt.close(fig)
 
 
@@ -356,12 +815,13 @@ def plot_histograma_mejor_ajuste(
     time_between_data: np.ndarray,
     best_model: dict,
     output_path: str,
+    histogram: tuple[np.ndarray, np.ndarray] | None = None,
 ) -> None:
     """
     Genera un histograma de los datos y la curva de la mejor distribución.
 
     Se combina el histograma de los tiempos entre eventos con la curva de
-    densidad de la distribución seleccionada por Fitter, para visualizar
+    densidad de la distribución seleccionada por menor SSE, para visualizar
     qué tan bien se ajusta el modelo al conjunto de datos.
 
     Parameters
@@ -375,53 +835,34 @@ def plot_histograma_mejor_ajuste(
     output_path : str
         Ruta de salida donde se guardará la figura en formato SVG. Si el
         directorio no existe, se crea automáticamente.
+    histogram : tuple[np.ndarray, np.ndarray] or None
+        Densidad y bordes de los bins calculados con _empirical_pdf(). Si es
+        None, se calculan a partir de time_between_data.
     """
-    n_bins = _freedman_diaconis_bins(time_between_data)
+    if histogram is None:
+        histogram = _empirical_pdf(time_between_data)
+    y_fit, x_bin = histogram
 
     dist_name = best_model["dist"]
     params = best_model["params"]
 
-    # Obtener el objeto de distribución de scipy.stats
-    dist = getattr(stats, dist_name)
-
     # Rango para la curva
     x_max = np.quantile(time_between_data, 0.99)
     x_values = np.linspace(0, x_max, 300)
-    pdf_values = dist.pdf(x_values, **params)
-
-    # Estilo definido
-    plt.style.use("classic")
-    mpl.rcParams.update(
-        {
-            "figure.facecolor": "white",
-            "axes.facecolor": "white",
-            "axes.edgecolor": "black",
-            "axes.grid": True,
-            "grid.color": "0.8",
-            "grid.linestyle": ":",
-            "grid.linewidth": 0.8,
-            "axes.spines.top": True,
-            "axes.spines.right": True,
-            "axes.linewidth": 1.0,
-            "xtick.direction": "in",
-            "ytick.direction": "in",
-            "font.size": 11,
-        }
-    )
-    sns.set_theme(style="whitegrid")
-
-    df = pd.DataFrame(time_between_data, columns=["time_between_data"])
+    pdf_values = _fast_pdf(dist_name, x_values, params)
 
     fig, ax = plt.subplots(figsize=(8, 6))
-    sns.histplot(
-        df["time_between_data"],
-        bins=n_bins,
-        stat="density",
-        color="C1",
-        alpha=0.6,
+    # Se dibujan las densidades ya calculadas: cada bin aporta su densidad
+    # como peso, sin volver a recorrer time_between_data. Las barras se
+    # rasterizan para no escribir un <path> por bin en el SVG
+    ax.hist(
+        x_bin[:-1],
+        bins=x_bin,
+        weights=y_fit,
+        color=mpl.colors.to_rgba("C1", alpha=0.6),
         edgecolor="black",
+        rasterized=True,
         label="Datos empíricos",
-        ax=ax,
     )
 
     ax.plot(
@@ -442,7 +883,7 @@ def plot_histograma_mejor_ajuste(
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     fig.tight_layout()
-    fig.savefig(output_path, format="svg", bbox_inches="tight")
+    fig.savefig(output_path, format="svg", dpi=150, bbox_inches="tight")
     plt.close(fig)
 
 
@@ -549,7 +990,8 @@ def main() -> None:
     - Verifica la existencia del archivo SQLite.
     - Carga los tiempos entre eventos desde la base de datos.
     - Calcula estadística descriptiva y la imprime en consola.
-    - Ajusta distribuciones de probabilidad usando Fitter.
+    - Ajusta distribuciones candidatas por máxima verosimilitud y elige la
+      de menor SSE frente al histograma.
     - Calcula los momentos teóricos del mejor modelo.
     - Genera y guarda las figuras de histograma y mejor ajuste.
     - Imprime un resumen del ajuste exponencial si la distribución ganadora
@@ -586,10 +1028,14 @@ def main() -> None:
     stats_desc = compute_descriptive_stats(time_between_data)
     _print_descriptive_stats_table(stats_desc)
 
-    # Ajustar varias distribuciones con Fitter
+    # Densidad empírica compartida por el ajuste y las gráficas
+    histogram = _empirical_pdf(time_between_data)
+
+    # Ajustar varias distribuciones candidatas
     best_model = fit_candidate_distributions(
         time_between_data,
         use_common_distributions=True,
+        histogram=histogram,
     )
 
     # Calcular momentos teóricos del modelo seleccionado
@@ -600,6 +1046,7 @@ def main() -> None:
     plot_histograma_datos(
         time_between_data=time_between_data,
         output_path=output_hist_datos,
+        histogram=histogram,
     )
 
     # Graficar histograma y curva de mejor ajuste
@@ -608,6 +1055,7 @@ def main() -> None:
         time_between_data=time_between_data,
         best_model=best_model,
         output_path=output_hist_ajuste,
+        histogram=histogram,
     )
     logger.info("Gráficas guardadas en docs/images/.")
 
@@ -3,23 +3,33 @@
 Este módulo:
 - Se conecta a un broker MQTT.
 - Se suscribe a un tópico configurado mediante variables de entorno.
-- Recibe mensajes, los parsea (JSON cuando es posible).
-- Inserta en la base de datos los eventos que contienen nombre y apellido.
+- Recibe mensajes, los parsea (JSON cuando es posible, mediante orjson).
+- Inserta en la base de datos, por lotes, los eventos que contienen nombre y
+  apellido.
 """
 
-import json
 import logging
 import os
+import signal
+import threading
 import time
 import uuid
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
+import orjson
 import paho.mqtt.client as mqtt
 from paho.mqtt.client import CallbackAPIVersion
 
-from models import session, Event
+from sqlalchemy.exc import (
+    DBAPIError,
+    DisconnectionError,
+    OperationalError,
+    SQLAlchemyError,
+)
+
+from models import engine, event_insert
 
 # Cargar variables de entorno desde archivo .env
 load_dotenv()
@@ -31,6 +41,24 @@ MQTT_USER = os.getenv("MQTT_USER", "admin")
 MQTT_PASS = os.getenv("MQTT_PASS", "admin")
 MQTT_TOPIC = os.getenv("MQTT_TOPIC", "test")
 
+# Zona horaria de las marcas de tiempo de los eventos; se construye una sola
+# vez en lugar de hacerlo por cada mensaje
+_TZ = ZoneInfo("America/Costa_Rica")
+
+# Parámetros de escritura por lotes: se insertan los eventos acumulados cuando
+# se alcanza FLUSH_SIZE o cuando pasan más de FLUSH_INTERVAL segundos desde la
+# última escritura
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 2.0  # segundos
+
+# Máximo de eventos que se conservan en el buffer mientras la base de datos
+# rechaza las escrituras; al superarlo se descartan los más antiguos
+MAX_BUFFER_SIZE = 10 * FLUSH_SIZE
+
+# Retardo mínimo y máximo entre intentos de reconexión al broker
+RECONNECT_MIN_DELAY = 1  # segundos
+RECONNECT_MAX_DELAY = 120  # segundos
+
 # Configurar logging para mostrar información en la terminal
 logging.basicConfig(
     level=logging.INFO,
@@ -38,6 +66,157 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Eventos recibidos que aún no se han escrito en la base de datos
+_buffer: list[dict] = []
+_last_flush = time.monotonic()
+_flush_failed = False
+
+# Se activa al recibir SIGTERM para detener el bucle principal
+_stop = threading.Event()
+
+
+def _is_transient_error(error):
+    """Indica si un error de base de datos puede resolverse al reintentar.
+
+    Se consideran transitorios los errores operativos (por ejemplo, "database
+    is locked") y las desconexiones; los errores de datos o de sentencia se
+    repetirían en cada intento.
+
+    Parameters
+    ----------
+    error : sqlalchemy.exc.SQLAlchemyError
+        Error producido al escribir en la base de datos.
+
+    Returns
+    -------
+    bool
+        True si conviene conservar los eventos y reintentar más tarde.
+    """
+    return isinstance(error, (OperationalError, DisconnectionError)) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    )
+
+
+def _keep_for_retry(error):
+    """Conserva el buffer para un reintento tras un error transitorio.
+
+    Si el buffer supera MAX_BUFFER_SIZE, se descartan los eventos más
+    antiguos.
+
+    Parameters
+    ----------
+    error : sqlalchemy.exc.SQLAlchemyError
+        Error transitorio producido al escribir en la base de datos.
+    """
+    global _flush_failed
+
+    _flush_failed = True
+    logger.error(
+        "Error al guardar %d eventos, se reintentará: %s",
+        len(_buffer),
+        error,
+        exc_info=True,
+    )
+    overflow = len(_buffer) - MAX_BUFFER_SIZE
+    if overflow > 0:
+        del _buffer[:overflow]
+        logger.warning(
+            "Buffer lleno; se descartaron los %d eventos más antiguos",
+            overflow,
+        )
+
+
+def _insert_one_by_one():
+    """Inserta los eventos del buffer de uno en uno.
+
+    Se usa cuando el lote completo falla por un error no transitorio, para
+    descartar solo los eventos que no se pueden guardar. Si aparece un error
+    transitorio, los eventos restantes se conservan para reintentarlos.
+    """
+    global _flush_failed
+
+    written = 0
+    for i, row in enumerate(_buffer):
+        try:
+            with engine.begin() as conn:
+                conn.execute(event_insert, row)
+        except SQLAlchemyError as e:
+            if _is_transient_error(e):
+                del _buffer[:i]
+                _keep_for_retry(e)
+                return
+            logger.error(
+                "Evento descartado, no se puede guardar %s: %s", row, e
+            )
+        else:
+            written += 1
+
+    _flush_failed = False
+    logger.info("Datos añadidos a la base de datos, %d eventos", written)
+    _buffer.clear()
+
+
+def flush_events():
+    """Inserta en la base de datos los eventos acumulados en el buffer.
+
+    Todos los eventos pendientes se escriben con una sola sentencia INSERT
+    de SQLAlchemy Core (executemany) y una sola transacción, sin pasar por la
+    unidad de trabajo del ORM. Si la escritura falla, se revierte la
+    transacción y:
+
+    - ante un error transitorio (base de datos bloqueada o desconexión), los
+      eventos se conservan en el buffer para reintentarlos en la siguiente
+      escritura, hasta un máximo de MAX_BUFFER_SIZE eventos;
+    - ante cualquier otro error, los eventos se insertan de uno en uno y se
+      descartan solo los que fallan.
+    """
+    global _last_flush, _flush_failed
+
+    if _buffer:
+        try:
+            # engine.begin() confirma al salir del bloque o revierte si
+            # ocurre una excepción
+            with engine.begin() as conn:
+                conn.execute(event_insert, _buffer)
+        except SQLAlchemyError as e:
+            if _is_transient_error(e):
+                _keep_for_retry(e)
+            else:
+                logger.warning(
+                    "Error al guardar el lote de %d eventos (%s); se "
+                    "insertarán de uno en uno",
+                    len(_buffer),
+                    e,
+                )
+                _insert_one_by_one()
+        else:
+            _flush_failed = False
+            logger.info(
+                "Datos añadidos a la base de datos, %d eventos", len(_buffer)
+            )
+            _buffer.clear()
+
+    _last_flush = time.monotonic()
+
+
+def _flush_due():
+    """Indica si corresponde escribir el buffer en la base de datos.
+
+    Se escribe cuando el buffer alcanza FLUSH_SIZE eventos o cuando pasa más
+    de FLUSH_INTERVAL desde la última escritura. Tras una escritura fallida
+    solo se reintenta por tiempo, para no intentar una escritura por cada
+    mensaje recibido.
+
+    Returns
+    -------
+    bool
+        True si se debe llamar a flush_events().
+    """
+    elapsed = time.monotonic() - _last_flush
+    if _flush_failed:
+        return elapsed > FLUSH_INTERVAL
+    return len(_buffer) >= FLUSH_SIZE or elapsed > FLUSH_INTERVAL
+
 
 def on_connect(client, userdata, flags, rc, properties=None):
     """Maneja el evento de conexión del cliente al broker MQTT.
@@ -63,10 +242,14 @@ def on_connect(client, userdata, flags, rc, properties=None):
 def on_message(client, userdata, msg):
     """Maneja la recepción de un mensaje desde el broker MQTT.
 
-    - Decodifica el payload (UTF-8 o Latin-1 como respaldo).
-    - Intenta parsear JSON; si falla, guarda el texto crudo.
-    - Si el mensaje contiene 'first_name' y 'last_name', lo almacena
-      en la base de datos junto con el tópico y la marca de tiempo.
+    - Intenta parsear el payload como JSON directamente desde los bytes con
+      orjson; si falla, reintenta decodificándolo como Latin-1 y, si
+      tampoco es JSON, guarda el texto crudo decodificado como UTF-8.
+    - Si el mensaje contiene 'first_name' y 'last_name' como texto, lo
+      agrega al buffer de eventos junto con el tópico y la marca de tiempo.
+    - Escribe el buffer en la base de datos cuando se llena o cuando ha
+      pasado FLUSH_INTERVAL desde la última escritura. El bucle principal
+      (_run_loop) también escribe por tiempo aunque no lleguen mensajes.
 
     Parameters
     ----------
@@ -76,42 +259,48 @@ def on_message(client, userdata, msg):
     try:
         topic = msg.topic
 
-        # Intentar decodificar el payload como UTF-8; si falla, usar Latin-1
-        try:
-            payload = msg.payload.decode("utf-8")
-        except UnicodeDecodeError:
-            payload = msg.payload.decode("latin-1")
-
         logger.info(
             "Mensaje recibido en el tópico '%s': %s...",
             topic,
-            payload[:100],
+            msg.payload[:100].decode("utf-8", errors="replace"),
         )
 
-        # Intentar interpretar el payload como JSON
+        # Intentar interpretar el payload como JSON; orjson acepta los bytes
+        # directamente, sin decodificarlos antes a texto
         try:
-            data = json.loads(payload)
-        except json.JSONDecodeError:
-            # Si no es JSON, almacenar el contenido crudo
-            data = {"raw": payload}
-
-        # Solo insertar en la DB si se encuentran las claves esperadas
-        if "first_name" in data and "last_name" in data:
+            data = orjson.loads(msg.payload)
+        except orjson.JSONDecodeError:
+            try:
+                # orjson solo acepta UTF-8; reintentar con Latin-1 para no
+                # perder nombres con tildes enviados en esa codificación
+                data = orjson.loads(msg.payload.decode("latin-1"))
+            except orjson.JSONDecodeError:
+                # Si no es JSON, almacenar el contenido crudo
+                data = {"raw": msg.payload.decode("utf-8", errors="replace")}
+
+        # Solo insertar en la DB si se encuentran las claves esperadas y son
+        # texto; otros tipos harían fallar la escritura del lote completo
+        if (
+            isinstance(data, dict)
+            and isinstance(data.get("first_name"), str)
+            and isinstance(data.get("last_name"), str)
+        ):
             # Añadir metadatos de tiempo y tópico
-            data["timestamp"] = datetime.now(ZoneInfo("America/Costa_Rica"))
+            data["timestamp"] = datetime.now(_TZ)
             data["topic"] = topic
 
-            # Crear registro ORM y guardarlo en la base de datos
-            record = Event(
-                topic=data["topic"],
-                first_name=data["first_name"],
-                last_name=data["last_name"],
-                timestamp=data["timestamp"],
+            # Acumular el evento para insertarlo en el siguiente lote
+            _buffer.append(
+                {
+                    "topic": data["topic"],
+                    "first_name": data["first_name"],
+                    "last_name": data["last_name"],
+                    "timestamp": data["timestamp"],
+                }
             )
-            session.add(record)
-            session.commit()
 
-            logger.info("Datos añadidos a la base de datos, id=%s", record.id)
+            if _flush_due():
+                flush_events()
 
     except Exception as e:
         # Registrar error inesperado durante el procesamiento del mensaje
@@ -121,7 +310,8 @@ def on_message(client, userdata, msg):
 def on_disconnect(client, userdata, flags, rc, properties=None):
     """Maneja el evento de desconexión del cliente del broker MQTT.
 
-    Distingue entre una desconexión esperada (rc == 0) y una inesperada.
+    Escribe los eventos pendientes del buffer y distingue entre una
+    desconexión esperada (rc == 0) y una inesperada.
 
     Parameters
     ----------
@@ -129,6 +319,9 @@ def on_disconnect(client, userdata, flags, rc, properties=None):
         Código de retorno de la desconexión. Un valor 0 indica desconexión
         iniciada de forma local o controlada.
     """
+    # No dejar eventos pendientes mientras el cliente está desconectado
+    flush_events()
+
     if rc != 0:
         logger.warning(
             "Desconexión inesperada del broker MQTT, código de retorno: %d", rc
@@ -137,12 +330,54 @@ def on_disconnect(client, userdata, flags, rc, properties=None):
         logger.info("Desconectado del broker MQTT")
 
 
+def _handle_sigterm(signum, frame):
+    """Solicita detener el bucle principal al recibir SIGTERM.
+
+    Solo activa _stop; la desconexión y la escritura de los eventos
+    pendientes se hacen al salir del bucle, fuera del manejador de señal.
+    """
+    logger.info("Señal de apagado recibida (SIGTERM)")
+    _stop.set()
+
+
+def _run_loop(client):
+    """Procesa la red MQTT y escribe el buffer por tiempo hasta el apagado.
+
+    A diferencia de loop_forever(), client.loop() retorna como máximo cada
+    segundo, lo que permite escribir los eventos pendientes aunque el tópico
+    quede sin mensajes. Si se pierde la conexión, se reintenta con un retardo
+    que se duplica entre RECONNECT_MIN_DELAY y RECONNECT_MAX_DELAY.
+
+    Parameters
+    ----------
+    client : paho.mqtt.client.Client
+        Cliente MQTT ya conectado al broker.
+    """
+    reconnect_delay = RECONNECT_MIN_DELAY
+
+    while not _stop.is_set():
+        if client.loop(timeout=1.0) != mqtt.MQTT_ERR_SUCCESS:
+            # loop() no reconecta por sí solo; esperar y reintentar
+            if _stop.wait(reconnect_delay):
+                break
+            try:
+                client.reconnect()
+                reconnect_delay = RECONNECT_MIN_DELAY
+            except OSError as e:
+                logger.warning("Fallo al reconectar al broker MQTT: %s", e)
+                reconnect_delay = min(2 * reconnect_delay, RECONNECT_MAX_DELAY)
+
+        if _flush_due():
+            flush_events()
+
+
 def main():
     """Función principal que configura y ejecuta el suscriptor MQTT.
 
     - Configura el cliente MQTT y sus callbacks.
     - Aplica lógica de reintentos para la conexión al broker.
-    - Inicia el bucle principal de recepción de mensajes.
+    - Inicia el bucle principal de recepción de mensajes, que se detiene con
+      Ctrl+C o SIGTERM escribiendo antes los eventos pendientes.
     """
     logger.info("Iniciando servicio de suscriptor MQTT...")
 
@@ -159,9 +394,6 @@ def main():
     # Configurar credenciales para autenticación en el broker
     client.username_pw_set(MQTT_USER, MQTT_PASS)
 
-    # Habilitar reconexión automática con un retardo progresivo
-    client.reconnect_delay_set(min_delay=1, max_delay=120)
-
     # Asociar funciones callback a los eventos relevantes
     client.on_connect = on_connect
     client.on_message = on_message
@@ -197,16 +429,22 @@ def main():
                 )
                 return
 
+    # Detener el servicio de forma controlada también con SIGTERM (por
+    # ejemplo, al detener un contenedor o un servicio de systemd)
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
     # Iniciar el bucle principal de recepción de mensajes
     try:
         logger.info("Iniciando bucle principal del cliente MQTT...")
-        client.loop_forever()
+        _run_loop(client)
     except KeyboardInterrupt:
         # Permitir detener el servicio con Ctrl+C de forma controlada
         logger.info("Señal de apagado recibida (KeyboardInterrupt)")
     finally:
-        # Asegurar la desconexión del broker al finalizar
+        # Asegurar la desconexión del broker al finalizar y escribir los
+        # eventos que quedaron en el buffer
         client.disconnect()
+        flush_events()
         logger.info("Servicio de suscriptor finalizado")
 
 
@@ -3,7 +3,7 @@
 import os
 
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Integer, String, create_engine
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, event
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 
@@ -46,18 +46,49 @@ class Event(Base):
     # Apellido incluido en el payload del mensaje
     last_name = Column(String)
 
-    # Marca de tiempo en que se registró el evento
-    timestamp = Column(DateTime)
+    # Marca de tiempo en que se registró el evento; indexada para que las
+    # consultas ordenadas por tiempo recorran el índice en lugar de ordenar
+    timestamp = Column(DateTime, index=True)
+
+
+# Sentencia INSERT de SQLAlchemy Core para la tabla de eventos; evita la
+# unidad de trabajo del ORM al escribir lotes de eventos
+event_insert = Event.__table__.insert()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Configura cada conexión SQLite nueva para escrituras frecuentes.
+
+    El modo WAL y synchronous=NORMAL evitan un fsync completo en cada commit
+    sin comprometer la consistencia de la base de datos. Además se amplía la
+    caché de páginas a 64 MiB y las tablas temporales se mantienen en memoria.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
 
 
 # Crear el motor de conexión a la base de datos (SQLite, según DATABASE_URL)
 engine = create_engine(database_url)
 
-# Crear la fábrica de sesiones vinculada al motor
-Session = sessionmaker(bind=engine)
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+
+# Crear la fábrica de sesiones vinculada al motor; los objetos no se expiran
+# tras cada commit para evitar recargas innecesarias desde la base de datos
+Session = sessionmaker(bind=engine, expire_on_commit=False)
 
 # Instancia de sesión para realizar operaciones con la base de datos
 session = Session()
 
 # Crear todas las tablas definidas en los modelos si aún no existen
 Base.metadata.create_all(engine)
+
+# create_all() no agrega índices a tablas ya existentes; crearlos aquí para
+# bases de datos anteriores a la definición del índice
+for index in Event.__table__.indexes:
+    index.create(engine, checkfirst=True)